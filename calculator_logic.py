@@ -1,5 +1,228 @@
+import array
+import ast
+import functools
 import math
 import re
+import types
+
+import expr_vm
+
+try:
+    import numpy as np
+except ImportError:  # optional: only needed for evaluate_batch()
+    np = None
+
+try:
+    import numba
+except ImportError:  # optional: native kernels for evaluate_batch()
+    numba = None
+
+
+def _identity(x):
+    return x
+
+
+def _sin_tenths(i: int) -> float:
+    """sin of i/10 degrees, reduced to the first quadrant so 0/90/180/270 are exact."""
+    quadrant, rest = divmod(i % 3600, 900)
+    angle = math.radians(rest / 10)
+    value = math.sin(angle) if quadrant % 2 == 0 else math.cos(angle)
+    return value if quadrant < 2 else -value
+
+
+# sin lookup table at 0.1 degree steps (DEG fast path for _sin/_cos)
+_SIN_LUT = array.array("d", (_sin_tenths(i) for i in range(3600)))
+
+# LLVM fast-math flags for numba kernels; nnan/ninf are left out so
+# out-of-domain points still come back as nan/inf (error_model="numpy"
+# makes division by zero do the same instead of raising)
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+@functools.lru_cache(maxsize=2)
+def _numba_env(deg: bool):
+    """
+    Numba-compiled counterparts of the batch functions (evaluate_batch fast path).
+    The angle mode is baked in, so DEG and RAD each get their own set.
+    """
+    jit = numba.njit(fastmath=_FASTMATH, error_model="numpy")
+
+    if deg:
+        @jit
+        def to_rad(x): return x * (math.pi / 180.0)
+    else:
+        @jit
+        def to_rad(x): return x
+
+    @jit
+    def sin(x): return math.sin(to_rad(x))
+    @jit
+    def cos(x): return math.cos(to_rad(x))
+    @jit
+    def tan(x): return math.tan(to_rad(x))
+
+    @jit
+    def ln(x): return math.log(x)
+    @jit
+    def log10(x): return math.log10(x)
+    @jit
+    def log(x, base=10.0):
+        return math.log10(x) if base == 10.0 else math.log(x) / math.log(base)
+
+    @jit
+    def sqrt(x): return math.sqrt(x)
+    @jit
+    def root(x, n=2):
+        if n % 2:
+            return math.copysign(abs(x) ** (1.0 / n), x)
+        return x ** (1.0 / n)
+
+    @jit
+    def exp(x): return math.exp(x)
+    @jit
+    def fabs(x): return abs(x)
+    @jit
+    def power(x, y): return float(x) ** y  # float like the NumPy path, no int64 wraparound
+
+    return types.MappingProxyType({
+        "pi": math.pi, "e": math.e,
+        "abs": fabs, "pow": power,
+        "sin": sin, "cos": cos, "tan": tan,
+        "ln": ln, "log": log, "log10": log10,
+        "sqrt": sqrt, "root": root,
+        "exp": exp,
+    })
+
+
+def _float64_consts(code):
+    """
+    Linked code with every numeric constant as np.float64, so the batch path
+    follows NumPy's nan/inf rules (1/0 -> inf, 2.5 % 0 -> nan) even where
+    both operands are constants. Ints too large for a double become +-inf.
+    """
+    out = []
+    for op, arg in code:
+        if op == expr_vm.PUSH_CONST and type(arg) in (int, float):
+            try:
+                arg = np.float64(arg)
+            except OverflowError:
+                arg = np.float64(math.inf if arg > 0 else -math.inf)
+        out.append((op, arg))
+    return out
+
+
+# Character substitutions and the allowed-character check used by _preprocess
+_SPECIAL = frozenset("×÷^")
+_SUB_RE = re.compile(r"[×÷^]")
+_SUB_MAP = {"×": "*", "÷": "/", "^": "**"}
+_VALID_RE = re.compile(r"[0-9a-zA-Z_+\-*/%.(),\s]*")
+
+
+def _sub_special(m):
+    return _SUB_MAP[m.group(0)]
+
+
+# Horner is only a win for dense, low-degree polynomials
+_HORNER_MAX_DEGREE = 16
+
+
+class _HornerRewriter(ast.NodeTransformer):
+    """
+    Finds sums of monomials c*x**k (same x, constant c, integer k >= 0)
+    and replaces them with the nested-multiply Horner form.
+    """
+
+    def __init__(self, variables):
+        self.variables = set(variables)
+        self.changed = False
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            horner = self._to_horner(node)
+            if horner is not None:
+                self.changed = True
+                return horner
+        return self.generic_visit(node)
+
+    def _terms(self, node, sign=1):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)):
+            right_sign = sign if isinstance(node.op, ast.Add) else -sign
+            return self._terms(node.left, sign) + self._terms(node.right, right_sign)
+        return [(sign, node)]
+
+    def _monomial(self, node):
+        """Return (coeff, var, power) or None."""
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return value, None, 0
+            return None
+        if isinstance(node, ast.Name) and node.id in self.variables:
+            return 1, node.id, 1
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            inner = self._monomial(node.operand)
+            if inner is None:
+                return None
+            return -inner[0], inner[1], inner[2]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            base = self._monomial(node.left)
+            power = node.right
+            if (base is None or base[0] != 1 or base[2] != 1
+                    or not isinstance(power, ast.Constant)
+                    or type(power.value) is not int or power.value < 1):
+                return None
+            return 1, base[1], power.value
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult):
+            left = self._monomial(node.left)
+            right = self._monomial(node.right)
+            if left is None or right is None:
+                return None
+            if left[1] is None:
+                return left[0] * right[0], right[1], right[2]
+            if right[1] is None:
+                return left[0] * right[0], left[1], left[2]
+        return None
+
+    def _to_horner(self, node):
+        coeffs = {}
+        var = None
+        var_terms = 0
+        for sign, term in self._terms(node):
+            mono = self._monomial(term)
+            if mono is None:
+                return None
+            coeff, name, power = mono
+            if name is not None:
+                if var is not None and name != var:
+                    return None
+                var = name
+                var_terms += 1
+            coeffs[power] = coeffs.get(power, 0) + sign * coeff
+
+        degree = max(coeffs)
+        if var_terms < 2 or degree < 2 or coeffs[degree] == 0:
+            return None
+        # sparse or high-degree polynomials (x^250 + x) would turn one power
+        # into hundreds of nested multiplies; leave those alone
+        nonzero = sum(1 for c in coeffs.values() if c != 0)
+        if degree > _HORNER_MAX_DEGREE or 2 * nonzero <= degree + 1:
+            return None
+
+        x = ast.Name(id=var, ctx=ast.Load())
+        lead = coeffs[degree]
+        if type(lead) is int and any(type(c) is float for c in coeffs.values()):
+            lead = float(lead)  # a float term (even one summing to 0.0) makes the result a float
+        result = x if type(lead) is int and lead == 1 else ast.BinOp(ast.Constant(lead), ast.Mult(), x)
+        for power in range(degree - 1, -1, -1):
+            coeff = coeffs.get(power, 0)
+            if coeff > 0:
+                result = ast.BinOp(result, ast.Add(), ast.Constant(coeff))
+            elif coeff < 0:
+                result = ast.BinOp(result, ast.Sub(), ast.Constant(-coeff))
+            if power:
+                result = ast.BinOp(result, ast.Mult(), x)
+        return result
+
 
 class CalculatorLogic:
     """
@@ -16,8 +239,55 @@ class CalculatorLogic:
     """
 
     def __init__(self, angle_mode="DEG"):
-        self.angle_mode = angle_mode  # "DEG" or "RAD"
-        self.history = []
+        # History stored column-wise: expressions + results as doubles (NaN if not a real number)
+        self._hist_exprs = []
+        self._hist_vals = array.array("d")
+
+        # Safe environment: only what we allow (built once, reused by every evaluation)
+        self._safe_env_mutable = {
+            "__builtins__": None,  # blocks dangerous builtins
+            # constants
+            "pi": math.pi,
+            "e": math.e,
+
+            # arithmetic helpers
+            "abs": abs,
+            "round": round,
+            "pow": pow,
+
+            # trig
+            "sin": self._sin,
+            "cos": self._cos,
+            "tan": self._tan,
+
+            # logs
+            "ln": self._ln,
+            "log": self._log,     # supports log(x) and log(x, base)
+            "log10": self._log10, # optional explicit base10
+
+            # roots
+            "sqrt": self._sqrt,
+            "root": self._root,
+
+            # factorials
+            "fact": self._fact,
+            "nPr": self._npr,
+            "nCr": self._ncr,
+            "exp": math.exp,
+
+        }
+        # read-only view handed to the compiler
+        self._safe_env = types.MappingProxyType(self._safe_env_mutable)
+
+        # Vectorized environment for evaluate_batch() (NumPy only)
+        self._vec_env = self._build_vec_env() if np is not None else None
+
+        # Compiled code objects keyed by preprocessed expression
+        self._compile = functools.lru_cache(maxsize=256)(self._compile_uncached)
+        self._compile_batch = functools.lru_cache(maxsize=256)(self._compile_batch_uncached)
+        self._numba_kernel = functools.lru_cache(maxsize=64)(self._numba_kernel_uncached)
+
+        self.set_angle_mode(angle_mode)  # "DEG" or "RAD"
 
     # -------------------------
     # Utility / Settings
@@ -28,32 +298,62 @@ class CalculatorLogic:
         if mode not in ("DEG", "RAD"):
             raise ValueError("Angle mode must be 'DEG' or 'RAD'")
         self.angle_mode = mode
+        # bound once here so trig calls don't re-compare the mode string
+        self._deg = mode == "DEG"
+        self._to_rad = math.radians if self._deg else _identity
+        # compiled code has trig of constants folded in for the old mode
+        self._compile.cache_clear()
+        self._compile_batch.cache_clear()
 
     def clear_history(self):
-        self.history.clear()
+        self._hist_exprs.clear()
+        del self._hist_vals[:]
 
     def get_history(self):
-        return list(self.history)
+        return list(zip(self._hist_exprs, self._hist_vals))
+
+    @property
+    def history(self):
+        return self.get_history()
 
     # -------------------------
     # Internal Helpers
     # -------------------------
 
-    def _to_radians(self, x: float) -> float:
-        if self.angle_mode == "DEG":
-            return math.radians(x)
-        return x
+    def _as_int(self, n, message: str) -> int:
+        """
+        Integer argument check for fact/nPr/nCr.
+        ints pass straight through; int-like floats are converted.
+        """
+        if isinstance(n, int):
+            return n
+        n = float(n)
+        if not n.is_integer():
+            raise ValueError(message)
+        return int(n)
+
+    def _history_value(self, result) -> float:
+        if isinstance(result, (int, float)):
+            try:
+                return float(result)
+            except OverflowError:
+                pass  # int too large for a double
+        return math.nan
 
     def _format_result(self, result):
         """
         Format output for display:
-        - int-like floats -> int
+        - ints as-is (checked first: most common case)
+        - int-like floats -> int, while they are exactly representable
         - trim long floats
         """
-        if isinstance(result, float):
-            if result.is_integer():
+        t = type(result)
+        if t is int:
+            return str(result)
+        if t is float:
+            if result.is_integer() and -1e16 < result < 1e16:
                 return str(int(result))
-            return f"{result:.12g}"
+            return format(result, ".12g")
         return str(result)
 
     def _preprocess(self, expr: str) -> str:
@@ -67,34 +367,79 @@ class CalculatorLogic:
         """
         expr = expr.strip()
 
-        expr = expr.replace("×", "*")
-        expr = expr.replace("÷", "/")
-        expr = expr.replace("^", "**")
+        # one substitution pass, skipped when none of × ÷ ^ appear
+        if not _SPECIAL.isdisjoint(expr):
+            expr = _SUB_RE.sub(_sub_special, expr)
 
         # Optional: block weird characters early
         # Allowed basic chars: digits, operators, parentheses, dot, comma, letters, underscore, spaces
-        if not re.fullmatch(r"[0-9a-zA-Z_+\-*/%.(),\s]*", expr):
+        if not _VALID_RE.fullmatch(expr):
             return "__INVALID_CHARS__"
 
         return expr
 
+    def _check_variables(self, variables):
+        for name in variables:
+            if not name.isidentifier() or name in self._safe_env:
+                raise ValueError(f"Error: Invalid Variable '{name}'")
+
+    def _horner_rewrite(self, expr: str, variables) -> str:
+        """
+        Rewrite polynomials in one variable to Horner form:
+            3*x**4 + 2*x**3 + x + 5  ->  (((3*x + 2)*x)*x + 1)*x + 5
+        so N powers become N multiplies.
+        Only dense sums (most coefficients non-zero) of degree 2..16 with >= 2
+        terms in the same variable are touched; anything else, including
+        expressions too deeply nested for ast, is passed through unchanged.
+        Float overflow is the one visible difference: x*x gives inf where
+        x**2 raises, so "x^2 - x" at x = 1e200 returns "inf", not an error.
+        """
+        try:
+            tree = ast.parse(expr, mode="eval")
+            rewriter = _HornerRewriter(variables)
+            tree = rewriter.visit(tree)
+            if not rewriter.changed:
+                return expr
+            return ast.unparse(tree)
+        except (SyntaxError, RecursionError, MemoryError, OverflowError):
+            return expr
+
     # -------------------------
     # Allowed math functions
     # -------------------------
-    def _sin(self, x): return math.sin(self._to_radians(float(x)))
-    def _cos(self, x): return math.cos(self._to_radians(float(x)))
+    def _sin(self, x):
+        x = float(x)
+        if self._deg:
+            # whole tenths of a degree come straight from the table
+            a = x * 10
+            if a.is_integer() and int(a) / 10 == x:
+                return _SIN_LUT[int(a) % 3600]
+        return math.sin(self._to_rad(x))
+
+    def _cos(self, x):
+        x = float(x)
+        if self._deg:
+            a = x * 10
+            if a.is_integer() and int(a) / 10 == x:
+                return _SIN_LUT[(int(a) + 900) % 3600]  # cos(x) = sin(x + 90)
+        return math.cos(self._to_rad(x))
 
     def _tan(self, x):
         angle = float(x)
-        if self.angle_mode == "DEG":
+        if self._deg:
             # tan undefined at 90 + k*180
-            if abs((angle % 180) - 90) < 1e-12:
+            if angle.is_integer():
+                # common case (whole degrees): integer check, no float modulo
+                if int(angle) % 180 == 90:
+                    raise ValueError("Domain Error")
+            elif abs((angle % 180) - 90) < 1e-12:
                 raise ValueError("Domain Error")
         else:
-            # RAD mode: undefined at pi/2 + k*pi
-            if abs((angle - (math.pi / 2)) % math.pi) < 1e-12:
+            # RAD mode: undefined at pi/2 + k*pi; remainder() gives the exact
+            # signed distance to the nearest pole, also for huge angles
+            if abs(math.remainder(angle - math.pi / 2, math.pi)) < 1e-12:
                 raise ValueError("Domain Error")
-        return math.tan(self._to_radians(angle))
+        return math.tan(self._to_rad(angle))
 
     def _ln(self, x):
         x = float(x)
@@ -117,9 +462,21 @@ class CalculatorLogic:
         base = float(base)
         if x <= 0 or base <= 0 or base == 1:
             raise ValueError("Domain Error")
+        # common bases: one dedicated log instead of log(x) / log(base)
+        if base == 10.0:
+            return math.log10(x)
+        if base == 2.0:
+            return math.log2(x)
+        if base == math.e:
+            return math.log(x)
         return math.log(x, base)
 
     def _sqrt(self, x):
+        # perfect squares stay exact ints
+        if isinstance(x, int) and x >= 0:
+            r = math.isqrt(x)
+            if r * r == x:
+                return r
         x = float(x)
         if x < 0:
             raise ValueError("Complex Result")
@@ -130,12 +487,23 @@ class CalculatorLogic:
         root(x, n) = nth root
         - supports negative x only for odd n (real root)
         """
-        x = float(x)
         n = int(n)
 
         if n <= 0:
             raise ValueError("Invalid Root")
 
+        # exact integer roots stay ints: root(27, 3) -> 3
+        if isinstance(x, int) and n <= 64:
+            r = round(abs(x) ** (1 / n))
+            if r ** n == abs(x):
+                if x < 0:
+                    if n % 2 == 0:
+                        raise ValueError("Complex Result")
+                    return -r
+                return r
+
+        x = float(x)
+
         if x < 0:
             if n % 2 == 0:
                 raise ValueError("Complex Result")
@@ -144,30 +512,22 @@ class CalculatorLogic:
         return x ** (1 / n)
     
     def _fact(self, n):
-        n = float(n)
-        if not n.is_integer():
-            raise ValueError("Factorial needs integer")
-        n = int(n)
+        n = self._as_int(n, "Factorial needs integer")
         if n < 0:
             raise ValueError("Domain Error")
         return math.factorial(n)
 
     def _npr(self, n, r):
-        n = float(n)
-        r = float(r)
-        if not n.is_integer() or not r.is_integer():
-            raise ValueError("nPr needs integers")
-        n, r = int(n), int(r)
+        n = self._as_int(n, "nPr needs integers")
+        r = self._as_int(r, "nPr needs integers")
         if n < 0 or r < 0 or r > n:
             raise ValueError("Domain Error")
-        return math.factorial(n) // math.factorial(n - r)
+        # n! / (n-r)! in C, without building n! first
+        return math.perm(n, r)
 
     def _ncr(self, n, r):
-        n = float(n)
-        r = float(r)
-        if not n.is_integer() or not r.is_integer():
-            raise ValueError("nCr needs integers")
-        n, r = int(n), int(r)
+        n = self._as_int(n, "nCr needs integers")
+        r = self._as_int(r, "nCr needs integers")
         if n < 0 or r < 0 or r > n:
             raise ValueError("Domain Error")
         return math.comb(n, r)
@@ -176,6 +536,41 @@ class CalculatorLogic:
     # -------------------------
     # Safe Evaluation Core
     # -------------------------
+    def _compile_uncached(self, expr: str, variables=()):
+        """
+        Compile a preprocessed expression into linked stack-VM code
+        (see expr_vm.py). Wrapped in an lru_cache per instance (see __init__),
+        so repeated expressions are only parsed once.
+        """
+        if variables:
+            expr = self._horner_rewrite(expr, variables)
+        code = expr_vm.link(expr_vm.parse(expr), self._safe_env, variables)
+        code = expr_vm.fold_constants(code)
+        return expr_vm.eliminate_common_subexpressions(code)
+
+    def _run(self, code, args=()):
+        """
+        Execute compiled code; args bind to the compiled variables in order.
+        """
+        return expr_vm.run(code, args)
+
+    def _specialize(self, code, nargs: int):
+        """
+        Straight-line Python function for compiled code; falls back to running
+        the VM if Python can't compile the generated source.
+        """
+        try:
+            return expr_vm.specialize(code, nargs)
+        except (SyntaxError, RecursionError, MemoryError):
+            pass
+
+        def run_vm(*args):
+            if len(args) != nargs:
+                raise TypeError("Wrong number of arguments")
+            return self._run(code, args)
+
+        return run_vm
+
     def evaluate(self, expression: str) -> str:
         """
         Evaluate the user expression safely.
@@ -192,46 +587,13 @@ class CalculatorLogic:
         if expr == "__INVALID_CHARS__":
             return "Error: Invalid Characters"
 
-        # Safe environment: only what we allow
-        safe_env = {
-            "__builtins__": None,  # blocks dangerous builtins
-            # constants
-            "pi": math.pi,
-            "e": math.e,
-
-            # arithmetic helpers
-            "abs": abs,
-            "round": round,
-            "pow": pow,
-
-            # trig
-            "sin": self._sin,
-            "cos": self._cos,
-            "tan": self._tan,
-
-            # logs
-            "ln": self._ln,
-            "log": self._log,     # supports log(x) and log(x, base)
-            "log10": self._log10, # optional explicit base10
-
-            # roots
-            "sqrt": self._sqrt,
-            "root": self._root,
-
-            # factorials
-            "fact": self._fact,
-            "nPr": self._npr,
-            "nCr": self._ncr,
-            "exp": math.exp,
-
-        }
-
         try:
             # Evaluate expression safely
-            result = eval(expr, safe_env, {})
+            result = self._run(self._compile(expr))
 
             # Save history
-            self.history.append((expression, result))
+            self._hist_exprs.append(expression)
+            self._hist_vals.append(self._history_value(result))
 
             return self._format_result(result)
 
@@ -246,3 +608,180 @@ class CalculatorLogic:
             return "Error: Invalid Expression"
         except Exception:
             return "Error: Invalid Expression"
+
+    def compile_expression(self, expr: str, vars=("x",)):
+        """
+        Compile an expression once and return a fast callable.
+
+        The names in `vars` become positional parameters, in order:
+            f = calc.compile_expression("x^2 + y", vars=("x", "y"))
+            f(3, 1)  -> "10"
+
+        Each call returns a formatted result or an error message, like
+        evaluate(), but skips preprocessing, parsing and name lookups:
+        the expression is turned into a generated Python function.
+        History is not updated.
+        Raises ValueError if the expression or variable names are invalid.
+        """
+        expr = self._preprocess(expr)
+
+        if expr == "" or expr == "__INVALID_CHARS__":
+            raise ValueError("Error: Invalid Characters" if expr else "Error: Empty Expression")
+
+        vars = tuple(vars)
+        self._check_variables(vars)
+
+        try:
+            code = self._compile(expr, vars)
+        except (SyntaxError, NameError):
+            raise ValueError("Error: Invalid Expression") from None
+
+        # straight-line Python for this one expression, no VM dispatch per call;
+        # one per angle mode, since trig of constants is folded in at compile time
+        specialized = {self.angle_mode: self._specialize(code, len(vars))}
+
+        def compiled(*args):
+            try:
+                fn = specialized.get(self.angle_mode)
+                if fn is None:
+                    fn = self._specialize(self._compile(expr, vars), len(vars))
+                    specialized[self.angle_mode] = fn
+                return self._format_result(fn(*args))
+            except ZeroDivisionError:
+                return "Error: Division by Zero"
+            except ValueError as ve:
+                return str(ve)
+            except Exception:
+                return "Error: Invalid Expression"
+
+        return compiled
+
+    # -------------------------
+    # Batch (NumPy) Evaluation
+    # -------------------------
+    def _to_radians_vec(self, x):
+        if self._deg:
+            return np.deg2rad(x)
+        return x
+
+    def _vroot(self, x, n=2):
+        # real nth root, odd roots of negatives stay real (like _root);
+        # n may be an array too, so pick per element
+        return np.where(n % 2, np.sign(x) * np.abs(x) ** (1 / n), np.power(x, 1 / n))
+
+    def _vlog(self, x, base=10):
+        return np.where(base == 10, np.log10(x), np.log(x) / np.log(base))
+
+    def _build_vec_env(self):
+        return types.MappingProxyType({
+            # constants
+            "pi": math.pi,
+            "e": math.e,
+
+            # arithmetic helpers
+            "abs": np.abs,
+            "round": lambda x, ndigits=0: np.round(x, int(ndigits)),
+            "pow": np.float_power,  # float64, int literals would overflow int64
+
+            # trig
+            "sin": lambda x: np.sin(self._to_radians_vec(x)),
+            "cos": lambda x: np.cos(self._to_radians_vec(x)),
+            "tan": lambda x: np.tan(self._to_radians_vec(x)),
+
+            # logs
+            "ln": np.log,
+            "log": self._vlog,
+            "log10": np.log10,
+
+            # roots
+            "sqrt": np.sqrt,
+            "root": self._vroot,
+
+            "exp": np.exp,
+        })
+
+    def _compile_batch_uncached(self, expr: str, variables):
+        code = expr_vm.link(
+            expr_vm.parse(self._horner_rewrite(expr, variables)), self._vec_env, variables
+        )
+        code = expr_vm.fold_constants(_float64_consts(code))
+        return expr_vm.eliminate_common_subexpressions(code)
+
+    def _numba_kernel_uncached(self, expr: str, variables, angle_mode: str):
+        """
+        Build a numba ufunc for the expression, or None if it uses something
+        numba can't compile (fact, round, ...). Kernels are cached per angle
+        mode in memory; numba's on-disk cache can't store exec-generated code.
+        """
+        try:
+            code = expr_vm.link(
+                expr_vm.parse(self._horner_rewrite(expr, variables)),
+                _numba_env(angle_mode == "DEG"),
+                variables,
+            )
+        except NameError:
+            return None
+        # same constants as the NumPy path, so both fold to the same inf/nan
+        code = expr_vm.fold_constants(_float64_consts(code))
+        code = expr_vm.eliminate_common_subexpressions(code)
+
+        nargs = len(variables)
+        signature = numba.float64(*[numba.float64] * nargs)
+        try:
+            kernel = numba.njit(fastmath=_FASTMATH, error_model="numpy")(
+                expr_vm.specialize(code, nargs)
+            )
+            # vectorize() has no error_model option, so it wraps a generated
+            # "def f(_a0, ...): return kernel(_a0, ...)" around the jitted kernel
+            call = [(expr_vm.LOAD_VAR, i) for i in range(nargs)] + [(expr_vm.CALL, (kernel, nargs))]
+            return numba.vectorize([signature], fastmath=_FASTMATH)(expr_vm.specialize(call, nargs))
+        except Exception:  # source too large, or numba typing/lowering error: use the NumPy path
+            return None
+
+    def evaluate_batch(self, expr: str, **arrays):
+        """
+        Evaluate an expression over whole NumPy arrays in one pass:
+            calc.evaluate_batch("sin(x)", x=np.arange(0, 361))
+
+        Keyword names are the expression's variables. Returns a float ndarray
+        (broadcast over the inputs). Out-of-domain points give nan/inf instead
+        of an error. fact/nPr/nCr are not available here.
+        With numba installed the expression is compiled to a native ufunc
+        (first call per expression pays the JIT cost); otherwise NumPy is used.
+        Raises ValueError for invalid expressions, ImportError without NumPy.
+        """
+        if np is None:
+            raise ImportError("evaluate_batch() requires NumPy")
+
+        expr = self._preprocess(expr)
+        if expr == "" or expr == "__INVALID_CHARS__":
+            raise ValueError("Error: Invalid Characters" if expr else "Error: Empty Expression")
+
+        variables = tuple(arrays)
+        self._check_variables(variables)
+        values = tuple(np.asarray(v, dtype=float) for v in arrays.values())
+
+        try:
+            with np.errstate(all="ignore"):  # constant folding may hit nan/inf
+                code = self._compile_batch(expr, variables)
+        except (SyntaxError, NameError):
+            raise ValueError("Error: Invalid Expression") from None
+
+        kernel = None
+        with np.errstate(all="ignore"):
+            if numba is not None and variables:
+                kernel = self._numba_kernel(expr, variables, self.angle_mode)
+
+            result = None
+            if kernel is not None:
+                try:
+                    result = kernel(*values)
+                except ArithmeticError:  # keep nan/inf semantics of the NumPy path
+                    result = None
+            if result is None:
+                result = np.asarray(self._run(code, values), dtype=float)
+
+        shape = np.broadcast_shapes(*(v.shape for v in values))
+        if result.shape != shape:
+            result = np.array(np.broadcast_to(result, shape))
+        return result
@@ -0,0 +1,506 @@
+"""
+Expression Parser + Stack VM
+
+Turns a calculator expression into a flat list of (opcode, arg) pairs
+using the shunting-yard algorithm, then runs it on a tiny stack machine.
+
+- parse(source)              -> postfix code, names still unresolved
+- link(code, env, variables) -> code with constants/functions looked up once
+- fold_constants(code)       -> constant subtrees evaluated once, at compile time
+- eliminate_common_subexpressions(code) -> repeated subtrees computed once
+- run(code, args)            -> result
+- to_source(code, params)    -> equivalent Python expression source
+- specialize(code, nparams)  -> straight-line Python function (no VM loop)
+"""
+
+import math
+import operator
+import re
+
+# -------------------------
+# Opcodes
+# -------------------------
+PUSH_CONST = 0   # arg: value
+LOAD_VAR = 1     # arg: index into run() args
+UNARY = 2        # arg: 1-arg callable
+BINARY = 3       # arg: 2-arg callable
+CALL = 4         # arg: (callable, argc)
+LOAD_TEMP = 7    # arg: temp slot
+STORE_TEMP = 8   # arg: temp slot (value stays on the stack)
+
+# Only produced by parse(), replaced by link()
+NAME = 5         # arg: identifier
+CALL_NAME = 6    # arg: (identifier, argc)
+
+# -------------------------
+# Grammar
+# -------------------------
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<num>
+            0[xX](?:_?[0-9a-fA-F])+ | 0[oO](?:_?[0-7])+ | 0[bB](?:_?[01])+
+          | (?:\d(?:_?\d)*\.?(?:\d(?:_?\d)*)? | \.\d(?:_?\d)*)
+            (?:[eE][+-]?\d(?:_?\d)*)?[jJ]?
+        )
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<op>\*\*|//|[-+*/%(),])
+      | (?P<bad>\S)
+    )""", re.VERBOSE)
+
+BINARY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "**": operator.pow,
+}
+
+UNARY_OPS = {
+    "-": operator.neg,
+    "+": operator.pos,
+}
+
+_SYMBOLS = {fn: symbol for symbol, fn in BINARY_OPS.items()}
+_UNARY_SYMBOLS = {fn: symbol for symbol, fn in UNARY_OPS.items()}
+
+# (precedence, right associative) -- same ordering as Python
+_PRECEDENCE = {
+    "+": (1, False), "-": (1, False),
+    "*": (2, False), "/": (2, False), "//": (2, False), "%": (2, False),
+    "unary": (3, True),
+    "**": (4, True),
+}
+
+
+def _tokens(source: str):
+    for m in _TOKEN_RE.finditer(source):
+        kind = m.lastgroup
+        if kind is None:
+            continue  # trailing whitespace
+        if kind == "bad":
+            raise SyntaxError(f"Unexpected character {m.group(kind)!r}")
+        yield kind, m.group(kind)
+
+
+def _number(text: str):
+    """Python numeric literal: 0x/0o/0b prefixes, _ separators, j suffix."""
+    try:
+        if text[:2].lower() in ("0x", "0o", "0b"):
+            return int(text, 0)
+        if text[-1] in "jJ":
+            return complex(text)
+        if "." in text or "e" in text or "E" in text:
+            return float(text)
+        return int(text, 0)  # like Python, rejects leading zeros ("01")
+    except ValueError:
+        raise SyntaxError(f"Invalid number {text!r}") from None
+
+
+# -------------------------
+# Shunting-yard
+# -------------------------
+def parse(source: str) -> list:
+    """
+    Convert an expression into postfix code.
+    Raises SyntaxError on malformed input.
+    """
+    out = []
+    # entries: ("op", symbol, is_unary) or ("(", function_name_or_None, argc)
+    stack = []
+    expect_operand = True
+    just_opened = False
+    pending_name = None
+
+    def flush_name():
+        nonlocal pending_name
+        if pending_name is not None:
+            out.append((NAME, pending_name))
+            pending_name = None
+
+    def pop_op():
+        _, symbol, unary = stack.pop()
+        if unary:
+            out.append((UNARY, UNARY_OPS[symbol]))
+        else:
+            out.append((BINARY, BINARY_OPS[symbol]))
+
+    for kind, text in _tokens(source):
+        opened = False
+
+        if kind in ("num", "name"):
+            if not expect_operand:
+                raise SyntaxError("Missing operator")
+            if kind == "num":
+                out.append((PUSH_CONST, _number(text)))
+            else:
+                pending_name = text
+            expect_operand = False
+
+        elif text == "(":
+            if pending_name is not None:
+                stack.append(("(", pending_name, 0))
+                pending_name = None
+            elif expect_operand:
+                stack.append(("(", None, 0))
+            else:
+                raise SyntaxError("Missing operator")
+            expect_operand = True
+            opened = True
+
+        elif text in (",", ")"):
+            flush_name()
+            while stack and stack[-1][0] == "op":
+                pop_op()
+            if not stack:
+                raise SyntaxError("Unbalanced parentheses")
+            _, func, argc = stack.pop()
+
+            if expect_operand:
+                # only "f()" may close with nothing inside
+                if not (text == ")" and just_opened and func is not None):
+                    raise SyntaxError("Missing operand")
+            else:
+                argc += 1
+
+            if text == ",":
+                if func is None:
+                    raise SyntaxError("Unexpected ','")
+                stack.append(("(", func, argc))
+                expect_operand = True
+            else:
+                if func is not None:
+                    out.append((CALL_NAME, (func, argc)))
+                expect_operand = False
+
+        elif expect_operand:
+            if text not in UNARY_OPS:
+                raise SyntaxError("Missing operand")
+            stack.append(("op", text, True))
+
+        else:
+            flush_name()
+            prec, _ = _PRECEDENCE[text]
+            while stack and stack[-1][0] == "op":
+                top = "unary" if stack[-1][2] else stack[-1][1]
+                top_prec, top_right = _PRECEDENCE[top]
+                if top_prec > prec or (top_prec == prec and not top_right):
+                    pop_op()
+                else:
+                    break
+            stack.append(("op", text, False))
+            expect_operand = True
+
+        just_opened = opened
+
+    flush_name()
+    if expect_operand:
+        raise SyntaxError("Missing operand")
+    while stack:
+        if stack[-1][0] != "op":
+            raise SyntaxError("Unbalanced parentheses")
+        pop_op()
+    return out
+
+
+# -------------------------
+# Linking
+# -------------------------
+def link(code: list, env, variables=()) -> list:
+    """
+    Resolve names once, so run() never does a dict lookup:
+    - variables        -> LOAD_VAR (positional index)
+    - env constants    -> PUSH_CONST
+    - env functions    -> CALL
+    Raises NameError for anything not allowed.
+    """
+    linked = []
+    for op, arg in code:
+        if op == NAME:
+            if arg in variables:
+                linked.append((LOAD_VAR, variables.index(arg)))
+                continue
+            value = _lookup(env, arg)
+            if callable(value):
+                raise NameError(f"'{arg}' is a function")
+            linked.append((PUSH_CONST, value))
+        elif op == CALL_NAME:
+            name, argc = arg
+            fn = _lookup(env, name)
+            if not callable(fn):
+                raise NameError(f"'{name}' is not a function")
+            linked.append((CALL, (fn, argc)))
+        else:
+            linked.append((op, arg))
+    return linked
+
+
+def _lookup(env, name):
+    if name.startswith("_") or name not in env:
+        raise NameError(f"Unknown name '{name}'")
+    return env[name]
+
+
+# -------------------------
+# Constant folding
+# -------------------------
+def fold_constants(code: list) -> list:
+    """
+    Evaluate subtrees with no variables at compile time:
+        2*pi*x        -> 6.283185307179586*x
+        sin(30) + x   -> 0.5 + x   (DEG)
+    Anything that raises (1/0, sqrt(-1), ...) is left in place so the
+    error still happens at run time.
+    """
+    out = []
+    spans = []  # per stack entry: (start index in out, is constant)
+
+    for op, arg in code:
+        if op == PUSH_CONST:
+            spans.append((len(out), True))
+            out.append((op, arg))
+            continue
+        if op == LOAD_VAR:
+            spans.append((len(out), False))
+            out.append((op, arg))
+            continue
+
+        if op == UNARY:
+            argc, fn = 1, arg
+        elif op == BINARY:
+            argc, fn = 2, arg
+        elif op == CALL:
+            fn, argc = arg
+        else:
+            return code  # already has temps
+
+        children = spans[len(spans) - argc:]
+        del spans[len(spans) - argc:]
+        start = children[0][0] if children else len(out)
+        out.append((op, arg))
+
+        if all(is_const for _, is_const in children):
+            try:
+                value = fn(*[out[i][1] for i, _ in children])
+            except Exception:
+                spans.append((start, False))
+                continue
+            del out[start:]
+            out.append((PUSH_CONST, value))
+            spans.append((start, True))
+        else:
+            spans.append((start, False))
+
+    return out
+
+
+# -------------------------
+# Common subexpressions
+# -------------------------
+def _node_key(op, arg):
+    if op == PUSH_CONST:
+        # keep 1 / 1.0 / -0.0 apart (they compare equal); ints by value,
+        # repr() of a huge folded int would hit the int-to-str digit limit
+        t = type(arg)
+        if t is float:
+            return op, t, arg, math.copysign(1.0, arg)
+        if t is complex:
+            return op, t, arg, math.copysign(1.0, arg.real), math.copysign(1.0, arg.imag)
+        return op, t, arg
+    if op == CALL:
+        return op, id(arg[0]), arg[1]
+    return op, id(arg) if op in (UNARY, BINARY) else arg
+
+
+def eliminate_common_subexpressions(code: list) -> list:
+    """
+    Value-number linked code: identical subtrees such as the two sin(x)
+    in "sin(x)*sin(x)" are computed once, stored in a temp slot
+    (STORE_TEMP) and reloaded afterwards (LOAD_TEMP).
+    Returns the code unchanged if nothing repeats.
+    """
+    nodes = []      # id -> (op, arg, children)
+    ids = {}        # structural key -> id
+    uses = []       # id -> times referenced by distinct parents
+    stack = []
+
+    for op, arg in code:
+        if op in (PUSH_CONST, LOAD_VAR):
+            children = ()
+        elif op == UNARY:
+            children = (stack.pop(),)
+        elif op == BINARY:
+            rhs = stack.pop()
+            children = (stack.pop(), rhs)
+        elif op == CALL:
+            argc = arg[1]
+            children = tuple(stack[len(stack) - argc:])
+            del stack[len(stack) - argc:]
+        else:
+            return code  # already has temps
+
+        key = (_node_key(op, arg), children)
+        nid = ids.get(key)
+        if nid is None:
+            nid = ids[key] = len(nodes)
+            nodes.append((op, arg, children))
+            uses.append(0)
+            for child in children:
+                uses[child] += 1
+        stack.append(nid)
+
+    shared = {nid for nid, (op, _, children) in enumerate(nodes) if children and uses[nid] > 1}
+    if not shared:
+        return code
+
+    # re-emit the DAG in postfix order; first visit stores, later visits load
+    out = []
+    slots = {}
+    work = [(stack[0], False)]
+    while work:
+        nid, expanded = work.pop()
+        op, arg, children = nodes[nid]
+        if expanded:
+            out.append((op, arg))
+            if nid in shared:
+                slots[nid] = len(slots)
+                out.append((STORE_TEMP, slots[nid]))
+        elif nid in slots:
+            out.append((LOAD_TEMP, slots[nid]))
+        else:
+            work.append((nid, True))
+            work.extend((child, False) for child in reversed(children))
+    return out
+
+
+# -------------------------
+# Stack VM
+# -------------------------
+def run(code: list, args=()):
+    """
+    Execute linked code and return the single value left on the stack.
+    """
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    temps = []
+
+    for op, arg in code:
+        if op == PUSH_CONST:
+            push(arg)
+        elif op == LOAD_VAR:
+            push(args[arg])
+        elif op == BINARY:
+            rhs = pop()
+            stack[-1] = arg(stack[-1], rhs)
+        elif op == UNARY:
+            stack[-1] = arg(stack[-1])
+        elif op == LOAD_TEMP:
+            push(temps[arg])
+        elif op == STORE_TEMP:
+            temps.append(stack[-1])  # slots are numbered in store order
+        else:
+            fn, argc = arg
+            if argc:
+                call_args = stack[-argc:]
+                del stack[-argc:]
+                push(fn(*call_args))
+            else:
+                push(fn())
+
+    return stack[0]
+
+
+# -------------------------
+# Source generation
+# -------------------------
+# Python precedence of generated source, for minimal parentheses
+_ATOM = 10
+_SOURCE_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "//": 2, "%": 2, "**": 4}
+_UNARY_PRECEDENCE = 3
+
+# ints wider than this are bound by name: repr() of very large ints fails
+_MAX_LITERAL_BITS = 1024
+
+
+def to_source(code: list, params) -> tuple:
+    """
+    Turn linked code back into a Python expression, with parentheses only
+    where precedence needs them (so long chains like x+x+...+x stay flat).
+    LOAD_VAR i becomes params[i]; temps become walrus assignments.
+    Returns (source, namespace): functions and constants without a literal
+    form are referenced by generated names (_f0, _c0, ...) defined in namespace.
+    """
+    stack = []  # (source, precedence)
+    namespace = {}
+    names = {}
+
+    def ref(obj, prefix):
+        name = names.get(id(obj))
+        if name is None:
+            name = names[id(obj)] = f"_{prefix}{len(names)}"
+            namespace[name] = obj
+        return name
+
+    def wrap(entry, min_prec):
+        text, prec = entry
+        return text if prec >= min_prec else f"({text})"
+
+    for op, arg in code:
+        if op == PUSH_CONST:
+            t = type(arg)
+            if (t is int and arg.bit_length() <= _MAX_LITERAL_BITS) or (t is float and math.isfinite(arg)):
+                text = repr(arg)
+                # negative numbers and -0.0 always get parentheses
+                if math.copysign(1, arg) < 0:
+                    text = f"({text})"
+                stack.append((text, _ATOM))
+            else:
+                stack.append((ref(arg, "c"), _ATOM))
+        elif op == LOAD_VAR:
+            stack.append((params[arg], _ATOM))
+        elif op == BINARY:
+            rhs = stack.pop()
+            lhs = stack.pop()
+            symbol = _SYMBOLS[arg]
+            prec = _SOURCE_PRECEDENCE[symbol]
+            if symbol == "**":
+                # right associative; "a ** -b" is fine, "-a ** b" is not
+                text = f"{wrap(lhs, prec + 1)} ** {wrap(rhs, _UNARY_PRECEDENCE)}"
+            else:
+                text = f"{wrap(lhs, prec)} {symbol} {wrap(rhs, prec + 1)}"
+            stack.append((text, prec))
+        elif op == UNARY:
+            operand = stack.pop()
+            text = f"{_UNARY_SYMBOLS[arg]}{wrap(operand, _UNARY_PRECEDENCE)}"
+            stack.append((text, _UNARY_PRECEDENCE))
+        elif op == LOAD_TEMP:
+            stack.append((f"_t{arg}", _ATOM))
+        elif op == STORE_TEMP:
+            stack[-1] = (f"(_t{arg} := {stack[-1][0]})", _ATOM)
+        elif op == CALL:
+            fn, argc = arg
+            args = [text for text, _ in stack[len(stack) - argc:]]
+            del stack[len(stack) - argc:]
+            stack.append((f"{ref(fn, 'f')}({', '.join(args)})", _ATOM))
+        else:
+            raise ValueError("Code must be linked first")
+
+    return stack[0][0], namespace
+
+
+def specialize(code: list, nparams: int):
+    """
+    Generate and exec a plain Python function equivalent to run(code, args),
+    e.g. "def _specialized(_a0): return (_f0(_a0) + (_a0 * _a0))".
+    Functions and constants are bound through the function's globals,
+    so calling it costs only the arithmetic and the calls themselves.
+    Raises SyntaxError/RecursionError/MemoryError if Python can't compile
+    the generated source (e.g. extremely long or deeply nested expressions).
+    """
+    params = [f"_a{i}" for i in range(nparams)]
+    source, namespace = to_source(code, params)
+    namespace["__builtins__"] = {}
+    exec(f"def _specialized({', '.join(params)}):\n    return {source}\n", namespace)
+    return namespace["_specialized"]
@@ -1,3 +1,4 @@
+import functools
 import tkinter as tk
 from tkinter import ttk
 from calculator_logic import CalculatorLogic
@@ -16,6 +17,10 @@ class CalculatorGUI:
         self.expr_var = tk.StringVar()
         self.expr_var.set("")
 
+        # Typed pieces of the expression, joined only when the display is refreshed
+        self._expr_parts = []
+        self._expr_text = ""
+
         # ---------------- Display ----------------
         display_frame = tk.Frame(root, padx=10, pady=10)
         display_frame.pack(fill="x")
@@ -53,12 +58,12 @@ class CalculatorGUI:
             ["0", ".", "=", ""],
         ]
 
-        for r in range(len(buttons)):
-            btn_frame.rowconfigure(r, weight=1)
-            for c in range(4):
-                btn_frame.columnconfigure(c, weight=1)
+        for c in range(4):
+            btn_frame.columnconfigure(c, weight=1)
 
-                text = buttons[r][c]
+        for r, row in enumerate(buttons):
+            btn_frame.rowconfigure(r, weight=1)
+            for c, text in enumerate(row):
                 if text == "":
                     continue
 
@@ -66,7 +71,7 @@ class CalculatorGUI:
                     btn_frame,
                     text=text,
                     font=("Arial", 16),
-                    command=lambda t=text: self.on_button_click(t)
+                    command=functools.partial(self.on_button_click, text)
                 )
                 btn.grid(row=r, column=c, sticky="nsew", padx=4, pady=4)
 
@@ -95,21 +100,38 @@ class CalculatorGUI:
         else:
             self.append_text(text)
 
-    def append_text(self, value):
+    def _sync_parts(self):
+        # The entry can also be edited directly; start over from what it shows
         current = self.expr_var.get()
-        self.expr_var.set(current + str(value))
+        if current != self._expr_text:
+            self._expr_parts = [current] if current else []
+
+    def _show_parts(self):
+        self._expr_text = "".join(self._expr_parts)
+        self.expr_var.set(self._expr_text)
+
+    def append_text(self, value):
+        self._sync_parts()
+        self._expr_parts.append(str(value))
+        self._show_parts()
 
     def clear(self):
-        self.expr_var.set("")
+        self._expr_parts.clear()
+        self._show_parts()
 
     def backspace(self):
-        current = self.expr_var.get()
-        self.expr_var.set(current[:-1])
+        self._sync_parts()
+        if self._expr_parts:
+            last = self._expr_parts.pop()[:-1]
+            if last:
+                self._expr_parts.append(last)
+        self._show_parts()
 
     def calculate(self):
         expr = self.expr_var.get()
         result = self.logic.evaluate(expr)
-        self.expr_var.set(result)
+        self._expr_parts = [result] if result else []
+        self._show_parts()
 
     def toggle_mode(self):
         if self.logic.angle_mode == "DEG":
@@ -1,3 +1,7 @@
+import math
+import warnings
+
+import expr_vm
 from calculator_logic import CalculatorLogic
 
 calc = CalculatorLogic(angle_mode="DEG")
@@ -21,3 +25,418 @@ tests = [
 
 for t in tests:
     print(t, "=>", calc.evaluate(t))
+
+f = calc.compile_expression("x^2 + 1")
+for x in (0, 1, 2):
+    print("x^2 + 1 @ x =", x, "=>", f(x))
+
+
+# -------------------------
+# Checks (run as a script, or with pytest)
+# -------------------------
+
+def reference(c, expression, variables=None):
+    """The original evaluation path: Python eval() over the safe environment."""
+    expr = c._preprocess(expression)
+    if expr == "":
+        return ""
+    if expr == "__INVALID_CHARS__":
+        return "Error: Invalid Characters"
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", SyntaxWarning)
+            return c._format_result(eval(expr, dict(c._safe_env), dict(variables or {})))
+    except ZeroDivisionError:
+        return "Error: Division by Zero"
+    except ValueError as ve:
+        return str(ve)
+    except Exception:
+        return "Error: Invalid Expression"
+
+
+SAME_AS_EVAL = [
+    # precedence / associativity
+    "2+3*5", "2-3-4", "8/4/2", "2*(3+4)*5", "3+4*2/(1-5)**2**3",
+    "2^3^2", "2**3**2", "-2**2", "-2^-2", "2**-1", "2**-1**2", "(-2)**2",
+    "--2", "+-2", "-(-2)", "2*-3", "-3*-2", "-pi",
+    "7//2", "-7//2", "7%3", "-7%3", "7.5%2", "10//3*3+10%3",
+    # literals
+    "1e3+.5", "1.5e-3*2", "5.", "0.1+0.2", "123456789012345678",
+    "0x1F", "0o17+0b101", "1_000*2", "1_0.5e1_0", "00", "1j*1j", "2+3J", "01", "1__0", "0b2",
+    # functions
+    "abs(-3)", "round(2.567, 2)", "pow(2, 10)", "pow(2, 0.5)",
+    "sqrt(2)", "sqrt(16.0)", "root(-27,3)", "root(16,4)", "root(2,3)", "root(8)",
+    "log(8,2)", "log(2**10, 2)", "log(27,3)", "ln(e)", "log10(1000)", "exp(1)",
+    "fact(5.0)", "nPr(10,3)", "nCr(10,3)*fact(3)", "nPr(1000,5)",
+    "sin(30)+cos(60)", "sin(30.05)", "sin(-30)", "tan(45)", "tan(89.5)",
+    # error mapping
+    "1/0", "1%0", "0**-1", "sqrt(-1)", "root(-16,4)", "root(16,0)",
+    "log(0)", "log(8,1)", "ln(0)", "fact(5.5)", "fact(-1)", "nPr(5,6)",
+    "nCr(5,2.5)", "tan(90)", "tan(-90)", "tan(270)", "exp(1000)",
+    "fact(2000)*sqrt(-1)",
+    # invalid input
+    "2+", "(2", "2)", "2 3", "2(3)", "sin 30", "x", "sin()", "sin(1,2)",
+    "nCr(5)", "__import__", "2$3", "", "  ",
+]
+
+
+def test_evaluate_matches_eval():
+    for mode in ("DEG", "RAD"):
+        c = CalculatorLogic(angle_mode=mode)
+        for expr in SAME_AS_EVAL:
+            assert c.evaluate(expr) == reference(c, expr), (mode, expr)
+        # second run goes through the compiled-code cache
+        for expr in SAME_AS_EVAL:
+            assert c.evaluate(expr) == reference(c, expr), (mode, expr)
+
+
+def test_evaluate_stricter_than_eval():
+    # Python-only syntax is rejected instead of leaking objects
+    for expr in ("sin", "(1,2)", "1,2", "().__class__", "(1).real", "True", "1 if 1 else 2", "2e"):
+        assert calc.evaluate(expr) == "Error: Invalid Expression", expr
+
+
+def test_parse_errors():
+    for expr in ("", "2+", "(2", "2)", "()", "(,1)", "log(8,)", "1..2", "2 3", "a.b", "01", "0_1", "1_"):
+        try:
+            expr_vm.parse(expr)
+        except SyntaxError:
+            continue
+        raise AssertionError(f"no SyntaxError for {expr!r}")
+
+
+HORNER = [
+    "x^2 + 1", "3*x^4+2*x^3+x+5", "x^2-2*x+1", "1-x^2-x", "-x^2+x", "2*x*x^2+x",
+    "1.0*x^2+x+1", "x^2+x-1.0*x+1", "0.5*x^3+x^2+x", "x^3+x^2+x+1.0",
+]
+
+
+def test_horner_matches_unrewritten():
+    c = CalculatorLogic()
+    for expr in HORNER:
+        f = c.compile_expression(expr)
+        for x in (0, 1, -3, 1.5, 10**17, 10**17 + 0.0):
+            assert f(x) == reference(c, expr, {"x": x}), (expr, x)
+    # the one documented difference: x*x overflows to inf where x**2 raises
+    assert c.compile_expression("x^2-x")(1e200) == "inf"
+
+
+def test_horner_only_dense_polynomials():
+    assert calc._horner_rewrite("3*x**4+2*x**3+x+5", ("x",)) != "3*x**4+2*x**3+x+5"
+    assert calc._horner_rewrite("1.0*x**2+x+1", ("x",)).startswith("(1.0 * x")
+    for expr in ("x**5+x", "x**250+x", "x**17+x**16+x", "x**2+y", "pi**2+pi"):
+        assert calc._horner_rewrite(expr, ("x",)) == expr, expr
+    assert calc._horner_rewrite("(" * 2000 + "x" + ")" * 2000, ("x",)).startswith("((")
+
+
+def test_tan_poles_rad():
+    # poles on both sides, large angles are not poles
+    rad = CalculatorLogic(angle_mode="RAD")
+    for t in ("tan(pi/2)", "tan(-pi/2)", "tan(3*pi/2)", "tan(pi/2+1e-13)", "tan(pi/2-1e-13)"):
+        assert rad.evaluate(t) == "Domain Error", t
+    for t in ("tan(1e17)", "tan(3e17)", "tan(1e19)", "tan(123456789e10)", "tan(1e20)"):
+        assert rad.evaluate(t) not in ("Domain Error", "Error: Invalid Expression"), t
+    assert rad.evaluate("tan(1e20)") == "-0.84460246302"
+
+
+def test_tan_poles_deg():
+    for t in ("tan(90)", "tan(-90)", "tan(270)", "tan(90.0)", "tan(450)", "tan(-270)", "tan(90+1e-13)"):
+        assert calc.evaluate(t) == "Domain Error", t
+    for t, want in (("tan(45)", "1"), ("tan(89.5)", "114.588650129"), ("tan(-45)", "-1")):
+        assert calc.evaluate(t) == want, t
+
+def test_history():
+    c = CalculatorLogic()
+    for expr in ("2+3", "fact(200)", "1/0", "sqrt(2)", "2^0.5"):
+        c.evaluate(expr)
+    history = c.get_history()
+    assert [e for e, _ in history] == ["2+3", "fact(200)", "sqrt(2)", "2^0.5"]
+    assert history[0] == ("2+3", 5.0) and math.isnan(history[1][1])  # too large for a double
+    assert history[2][1] == history[3][1] == math.sqrt(2)
+    assert [e for e, _ in c.history] == [e for e, _ in history]
+    c.clear_history()
+    assert c.get_history() == [] and c.history == []
+
+BATCH = [
+    "sin(x)^2 + cos(x)^2", "3*x^4+2*x^3+x+5", "tan(x)", "log(x, 2) + ln(x)", "log(x)",
+    "sqrt(x) + root(x, 3)", "root(x, 4)", "x + pow(2, 100)", "pow(2, -1)*x", "exp(x/100)",
+    "abs(x) + x % 7 + x // 3", "round(x/7, 2)", "x^-1", "1/x", "2*pi*x",
+]
+BATCH_XS = [0.0, 1.0, 2.0, 30.0, 45.5, 90.0, -8.0, 270.0]
+
+
+def _batch_backends():
+    """numba settings to run the batch checks under (None = NumPy path)."""
+    import calculator_logic
+    return [None] if calculator_logic.numba is None else [None, calculator_logic.numba]
+
+
+def _check_batch(expected):
+    """Run each expression in `expected` through evaluate_batch on every backend."""
+    import calculator_logic
+    import numpy as np
+
+    saved = calculator_logic.numba
+    try:
+        for backend in _batch_backends():
+            calculator_logic.numba = backend
+            for mode in ("DEG", "RAD"):
+                c = CalculatorLogic(angle_mode=mode)
+                for expr, check in expected(c).items():
+                    got = c.evaluate_batch(expr, x=np.array(BATCH_XS))
+                    assert got.shape == (len(BATCH_XS),), (expr, got)
+                    for x, value in zip(BATCH_XS, got):
+                        assert check(x, value), (backend, mode, expr, x, value)
+    finally:
+        calculator_logic.numba = saved
+
+
+def test_batch_matches_scalar():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return
+
+    def expected(c):
+        checks = {}
+        for expr in BATCH:
+            f = c.compile_expression(expr)
+
+            def check(x, value, f=f):
+                want = f(x)
+                if want.startswith(("Error", "Domain", "Complex", "Invalid")):
+                    # out of domain: nan/inf (tan poles land on a huge finite value)
+                    return not math.isfinite(value) or abs(value) > 1e15
+                return math.isclose(value, float(want), rel_tol=1e-9, abs_tol=1e-9)
+            checks[expr] = check
+        return checks
+
+    _check_batch(expected)
+
+
+def test_batch_nan_inf_instead_of_errors():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return
+
+    def expected(c):
+        return {
+            "1/0 + x": lambda x, v: v == math.inf,
+            "x + 2.5 % 0": lambda x, v: math.isnan(v),
+            "root(x, 0)": lambda x, v: math.isnan(v) or v in (0.0, 1.0, math.inf),
+            "root(x, x)": lambda x, v: math.isclose(v, x ** (1 / x)) if x > 0 else math.isnan(v) or v == 0,
+            "log(x, x)": lambda x, v: math.isnan(v) or math.isclose(v, 1.0),
+            "log(x, 10) - log10(x)": lambda x, v: math.isnan(v) or v == 0,
+            "x + 2^2000": lambda x, v: v == math.inf,
+            "x*10^400": lambda x, v: v == math.copysign(math.inf, x) if x else math.isnan(v),
+            "x - " + str(10**400): lambda x, v: v == -math.inf,
+            "x + 1e308*10": lambda x, v: v == math.inf,
+        }
+
+    _check_batch(expected)
+
+def test_sin_cos_lookup_table():
+    c = CalculatorLogic(angle_mode="DEG")
+    for tenths in range(-7200, 7200, 7):
+        x = tenths / 10
+        assert abs(c._sin(x) - math.sin(math.radians(x))) < 1e-12, x
+        assert abs(c._cos(x) - math.cos(math.radians(x))) < 1e-12, x
+    # quadrant reduction makes the axes exact
+    for x, s, co in ((0, 0.0, 1.0), (90, 1.0, 0.0), (180, 0.0, -1.0), (270, -1.0, 0.0), (-90, -1.0, 0.0)):
+        assert c._sin(x) == s and c._cos(x) == co, x
+    assert c.evaluate("sin(180)") == "0" and c.evaluate("cos(90)") == "0"
+    # off-grid angles and RAD mode use math.sin/cos
+    assert c._sin(30.05) == math.sin(math.radians(30.05))
+    c.set_angle_mode("RAD")
+    assert c._sin(30) == math.sin(30) and c._cos(0.5) == math.cos(0.5)
+
+def test_format_result():
+    fmt = calc._format_result
+    assert fmt(2**60) == "1152921504606846976" and fmt(-7) == "-7"
+    assert fmt(3.0) == "3" and fmt(-0.0) == "0" and fmt(1e15) == "1000000000000000"
+    # int-like floats past 1e16 are not exact any more: keep float formatting
+    assert fmt(1e16) == "1e+16" and fmt(-1e16) == "-1e+16" and fmt(2.0**60) == "1.15292150461e+18"
+    assert fmt(1 / 3) == "0.333333333333" and fmt(math.inf) == "inf" and fmt(math.nan) == "nan"
+    assert fmt(1j) == "1j"
+    assert calc.evaluate("2.0^60") == "1.15292150461e+18" and calc.evaluate("2^60") == "1152921504606846976"
+
+def test_common_subexpressions():
+    code = calc._compile("sin(x)**2 + cos(x)**2 + sin(x)", ("x",))
+    assert sum(op == expr_vm.CALL for op, _ in code) == 2
+    assert (expr_vm.STORE_TEMP, 0) in code and (expr_vm.LOAD_TEMP, 0) in code
+
+    # 1 / 1.0 / -0.0 / 0.0 compare equal but are different constants
+    code = expr_vm.eliminate_common_subexpressions(expr_vm.parse("(1+x)*(1.0+x)*(-0.0+x)*(0.0+x)"))
+    assert not any(op == expr_vm.LOAD_TEMP for op, _ in code)
+    # nothing repeats: code is returned as is
+    code = expr_vm.parse("x+1")
+    assert expr_vm.eliminate_common_subexpressions(code) is code
+
+    for expr in ("sin(x)*sin(x) + sin(x)", "(x+1)*(x+1)+(x+1)", "(1+x)*(1.0+x)", "fact(x)+fact(x)"):
+        f = calc.compile_expression(expr)
+        for x in (0, 2, 3.5, -1):
+            assert f(x) == reference(calc, expr, {"x": x}), (expr, x)
+    for expr in ("sin(pi/4)*sin(pi/4)", "(1+2)*(1+2)+(1+2)", "fact(3)+fact(3)+nCr(fact(3),2)"):
+        assert calc.evaluate(expr) == reference(calc, expr), expr
+
+def test_integer_arguments():
+    # ints pass through untouched: no rounding through float, no overflow
+    n = 10**20 + 1
+    assert calc._ncr(n, 2) == n * (n - 1) // 2
+    assert calc._npr(10**400, 1) == 10**400
+    assert calc._ncr(10**400, 10**400) == 1
+    # int-like floats are still accepted, other floats are not
+    assert calc._fact(5.0) == 120 and type(calc._fact(5.0)) is int
+    assert calc._npr(5.0, 2) == 20 and calc._ncr(5, 2.0) == 10
+    for call, message in ((lambda: calc._fact(5.5), "Factorial needs integer"),
+                          (lambda: calc._npr(5, 2.5), "nPr needs integers"),
+                          (lambda: calc._ncr(5.5, 2), "nCr needs integers"),
+                          (lambda: calc._fact(-1), "Domain Error")):
+        try:
+            call()
+        except ValueError as ve:
+            assert str(ve) == message, (message, ve)
+        else:
+            raise AssertionError(message)
+
+def test_log_common_bases():
+    # dedicated log10/log2/log are exact where log(x) / log(base) is not
+    assert calc._log(1000) == 3.0 and calc._log(10**15, 10) == 15.0
+    assert calc._log(2**29, 2) == 29.0 and calc._log(8, 2.0) == 3.0
+    assert calc._log(math.e**3, math.e) == math.log(math.e**3)
+    assert calc._log(27, 3) == math.log(27, 3)
+    assert calc.evaluate("log(1000)") == "3" and calc.evaluate("log(2^29, 2)") == "29"
+    for args in ((0,), (-1, 2), (8, 1), (8, 0), (8, -2)):
+        try:
+            calc._log(*args)
+        except ValueError as ve:
+            assert str(ve) == "Domain Error"
+        else:
+            raise AssertionError(args)
+
+def test_exact_integer_roots():
+    assert calc._sqrt(10**40) == 10**20 and type(calc._sqrt(10**40)) is int
+    assert calc._sqrt(0) == 0 and type(calc._sqrt(0)) is int
+    assert type(calc._sqrt(10**40 + 1)) is float and type(calc._sqrt(16.0)) is float
+    for x, n, want in ((27, 3, 3), (-27, 3, -3), (3**40, 40, 3), (2**64, 64, 2), (10**40, 2, 10**20), (1, 7, 1)):
+        got = calc._root(x, n)
+        assert got == want and type(got) is int, (x, n, got)
+    assert type(calc._root(28, 3)) is float and type(calc._root(2**65, 65)) is float
+    assert calc.evaluate("root(10^40, 2)") == "100000000000000000000"
+    for call in (lambda: calc._sqrt(-4), lambda: calc._root(-16, 4)):
+        try:
+            call()
+        except ValueError as ve:
+            assert str(ve) == "Complex Result"
+        else:
+            raise AssertionError("no Complex Result")
+
+COMPILED = [
+    "x^2 + 1", "x^5+x", "x^250+x", "sin(x)^2 + cos(x)^2", "2*pi*x", "-x^2", "(-x)^2",
+    "x^-2", "-2^x", "2^-x", "x^3^2", "(x^3)^2", "2-(x-1)", "x-(-1)", "x/(2*x)", "x//2*3",
+    "(-0.0)^x", "x % 3", "1/x", "fact(x)", "sqrt(x)", "log(x, 2)", "x + fact(200)",
+    "x + 2^2000", "tan(x)", "+".join(["x"] * 300), "(" * 150 + "x" + ")" * 150,
+    "-" * 50 + "x",
+]
+
+
+def test_compile_expression_matches_eval():
+    for mode in ("DEG", "RAD"):
+        c = CalculatorLogic(angle_mode=mode)
+        for expr in COMPILED:
+            f = c.compile_expression(expr)
+            for x in (0, 1, 2, -3, 1.5, 90):
+                assert f(x) == reference(c, expr, {"x": x}), (mode, expr, x)
+    f = calc.compile_expression("x*y", vars=("x", "y"))
+    assert f(3, 4) == "12" and f(3) == "Error: Invalid Expression"
+    for bad in ("x +", "y", "sin"):
+        try:
+            calc.compile_expression(bad)
+        except ValueError:
+            continue
+        raise AssertionError(bad)
+
+
+def test_generated_source():
+    def source(expr):
+        code = expr_vm.link(expr_vm.parse(expr), calc._safe_env, ("x",))
+        return expr_vm.to_source(code, ["x"])[0]
+
+    # only the parentheses precedence needs
+    assert source("x+x+x") == "x + x + x"
+    assert source("x-(x-x)") == "x - (x - x)"
+    assert source("(x**x)**x") == "(x ** x) ** x" and source("x**x**x") == "x ** x ** x"
+    assert source("-x**2") == "-x ** 2" and source("(-x)**2") == "(-x) ** 2"
+    assert source("x**-x") == "x ** -x"
+    # negative literals (after folding) and -0.0 stay parenthesized
+    code = [(expr_vm.PUSH_CONST, -2), (expr_vm.PUSH_CONST, 2), (expr_vm.BINARY, expr_vm.BINARY_OPS["**"])]
+    assert expr_vm.to_source(code, [])[0] == "(-2) ** 2" and expr_vm.specialize(code, 0)() == 4
+    code = [(expr_vm.PUSH_CONST, -0.0), (expr_vm.LOAD_VAR, 0), (expr_vm.BINARY, expr_vm.BINARY_OPS["**"])]
+    assert expr_vm.to_source(code, ["x"])[0] == "(-0.0) ** x"
+    # huge ints and non-finite floats are bound by name
+    text, namespace = expr_vm.to_source([(expr_vm.PUSH_CONST, 2**2000)], [])
+    assert text == "_c0" and namespace["_c0"] == 2**2000
+    text, namespace = expr_vm.to_source([(expr_vm.PUSH_CONST, math.inf)], [])
+    assert text == "_c0" and namespace["_c0"] == math.inf
+
+
+def test_specialize_falls_back_to_vm():
+    # generated source too deeply nested for Python's own compiler
+    deep = "x" + "-(x" * 1000 + ")" * 1000 + "+1"
+    code = calc._compile(deep, ("x",))
+    try:
+        expr_vm.specialize(code, 1)
+    except (SyntaxError, RecursionError, MemoryError):
+        pass
+    else:
+        raise AssertionError("specialize() did not fail")
+    assert calc.compile_expression(deep)(2) == "3"
+    f = calc._specialize(code, 1)
+    assert f(2) == 3
+    try:
+        f()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("no TypeError")
+
+def test_constant_folding():
+    code = calc._compile("2*pi*x + 1/0*x", ("x",))
+    assert code[0] == (expr_vm.PUSH_CONST, 2 * math.pi)
+    assert (expr_vm.BINARY, expr_vm.BINARY_OPS["/"]) in code  # 1/0 left for run time
+    assert calc._compile("sin(30) + fact(5)") == [(expr_vm.PUSH_CONST, 120.5)]
+    for expr in ("2*pi*3", "(0.0-1)*(-0.0)", "1+1.0", "(2+3)*(2+3)*(2+3)", "sqrt(-1)+1",
+                 "fact(2000)*sqrt(-1)", "1/0+fact(3)", "exp(1000)-exp(1000)"):
+        assert calc.evaluate(expr) == reference(calc, expr), expr
+
+
+def test_angle_mode_switch_with_cached_code():
+    # sin(30) is folded at compile time, so cached code must follow the mode
+    c = CalculatorLogic(angle_mode="DEG")
+    f = c.compile_expression("sin(30) + x*0")
+    assert c.evaluate("sin(30)") == "0.5" and f(1) == "0.5"
+    c.set_angle_mode("RAD")
+    assert c.evaluate("sin(30)") == reference(c, "sin(30)") == f(1) == "-0.988031624093"
+    assert c.evaluate("sin(pi/6)") == "0.5"
+    c.set_angle_mode("DEG")
+    assert c.evaluate("sin(30)") == "0.5" and f(1) == "0.5"
+
+def test_permutations():
+    assert calc._npr(1000, 5) == math.factorial(1000) // math.factorial(995)
+    assert calc._npr(5, 0) == 1 and calc._npr(5, 5) == 120 and calc._npr(0, 0) == 1
+    assert calc._npr(10**6, 3) == 10**6 * (10**6 - 1) * (10**6 - 2)
+    assert calc._ncr(1000, 5) == math.factorial(1000) // (math.factorial(995) * math.factorial(5))
+    for args in ((5, 6), (-1, 0), (5, -1)):
+        try:
+            calc._npr(*args)
+        except ValueError as ve:
+            assert str(ve) == "Domain Error"
+        else:
+            raise AssertionError(args)
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_") and callable(check):
+            check()
+    print("all checks passed")